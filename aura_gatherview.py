@@ -25,26 +25,100 @@
 # ****************************************************************************
 
 
-import matplotlib
-matplotlib.use('WXAgg')
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_wxagg import FigureCanvasWxAgg as FigCanvas
-from matplotlib.backends.backend_wxagg import NavigationToolbar2Wx
-
-import matplotlib.cm as cm
+try:
+    import wx
+except ImportError:
+    print("Oops!! Cannot import wxPython, please verify that it is installed")
 
-from matplotlib.ticker import FormatStrFormatter
-majorFormatter = FormatStrFormatter('%i')
+#  matplotlib is imported when the window layout is built (see doLayout and
+#  formatAxes), and the optional numba dependency when IBM data is first
+#  decoded (see ibm2ieee), so importing this module does not pull in the
+#  plotting stack or the numba/LLVM compiler
 
 import numpy as np
 import os
+import collections
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import auralib as aura
 
-try:
-    import wx
-except ImportError:
-    print("Oops!! Cannot import wxPython, please verify that it is installed")
+
+#  Numpy dtypes for the SEG-Y data sample format codes stored in the binary
+#  header.  IBM floats (code 1) are read as raw 32-bit words and decoded.
+samp_dtypes = {1:'>u4', 2:'>i4', 3:'>i2', 5:'>f4', 8:'i1'}
+
+#  Numpy dtypes for the trace header format codes used in the header
+#  definition text boxes.  IBM floats are read as raw words and decoded.
+thead_dtypes = {'l':'>i4', 'f':'>f4', 'ibm':'>u4', 'h':'>i2', 's':'i1'}
+
+#  Number of bytes for each trace header format code
+thead_nbytes = {'l':4, 'f':4, 'ibm':4, 'h':2, 's':1}
+
+
+#  numba compiled version of _ibm2ieee_loop.  numba is optional and heavy
+#  to import, so this is only built the first time IBM data is decoded;
+#  None until then, False if numba is not installed.
+_ibm2ieee_nb = None
+_ibm2ieee_nb_lock = threading.Lock()
+
+
+def _ibm2ieee_loop(ibm):
+    """
+    IBM to IEEE conversion of a 1D array of 32-bit words, written as a
+    plain loop for compiling with numba.
+    """
+    
+    out = np.empty(ibm.size, dtype=np.float32)
+    for i in range(ibm.size):
+        word = ibm[i]
+        mant = (word & 0x00ffffff) / 16777216.0
+        expo = ((word >> 24) & 0x7f) - 64
+        val = mant * 16.0**expo
+        if word >> 31:
+            val = -val
+        out[i] = val
+    
+    return out
+
+
+def _get_ibm2ieee_nb():
+    """
+    Return the numba compiled IBM to IEEE kernel, importing numba and
+    compiling it on first use, or False if numba is not installed.
+    """
+    
+    global _ibm2ieee_nb
+    
+    with _ibm2ieee_nb_lock:
+        if _ibm2ieee_nb is None:
+            try:
+                import numba
+            except ImportError:
+                _ibm2ieee_nb = False
+            else:
+                _ibm2ieee_nb = numba.njit(cache=True)(_ibm2ieee_loop)
+    
+    return _ibm2ieee_nb
+
+
+def ibm2ieee(ibm):
+    """
+    Convert an array of IBM System/360 floats stored as 32-bit words to
+    IEEE float32.  Uses a numba kernel when numba is installed.
+    """
+
+    ibm = np.ascontiguousarray(ibm, dtype=np.uint32)
+    
+    kernel = _get_ibm2ieee_nb()
+    if kernel:
+        return kernel(ibm.ravel()).reshape(ibm.shape)
+    
+    sign = np.where(ibm >> 31, np.float32(-1.0), np.float32(1.0))
+    expo = ((ibm >> 24) & 0x7f).astype(np.int32) - 64
+    mant = (ibm & 0x00ffffff).astype(np.float32) / np.float32(2**24)
+
+    return np.ldexp(sign*mant, 4*expo)
 
 
 class AuraSEGYView(wx.Frame):
@@ -74,6 +148,30 @@ class AuraSEGYView(wx.Frame):
         self.amp_min = -5000
         self.amp_max = 5000
         
+        self._thead_dirty = True
+        
+        #  Read-ahead cache of recently used and prefetched trace windows
+        self._trace_cache = collections.OrderedDict()
+        self._trace_cache_size = 8
+        self._cache_lock = threading.Lock()
+        self._prefetch_pool = ThreadPoolExecutor(max_workers=1)
+        self._prefetch_futures = []
+        self.Bind(wx.EVT_CLOSE, self.OnClose)
+        
+        #  Foreground window reads run on a worker thread; results from
+        #  reads superseded by a newer request are discarded
+        self._read_lock = threading.Lock()
+        self._read_id = 0
+        
+        #  Seismic image artist, created on the first draw and updated in place
+        self._im = None
+        self._updating_view = False
+        
+        #  Trace number offsets for the header plot, reused while the number
+        #  of traces in the plotted window is unchanged
+        self._x_len = 0
+        self._x_axis = None
+        
         self.DoCreateMenus()
         #self.SetBackgroundColour([100,100,100])
         self.doLayout()
@@ -86,6 +184,12 @@ class AuraSEGYView(wx.Frame):
         Method to build the figure window layout.
         """
         
+        import matplotlib
+        matplotlib.use('WXAgg')
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_wxagg import FigureCanvasWxAgg as FigCanvas
+        from matplotlib.backends.backend_wxagg import NavigationToolbar2Wx
+        
         #  wxPython and Matplotlib use different RGB ranges (0-255 and 0-1 
         #  respectively).  The following lines convert the matplotlib 
         #  foreground colour to the equivalent wxPython colour
@@ -103,7 +207,16 @@ class AuraSEGYView(wx.Frame):
         
         # twinned axes to handle graphing of trace header values
         self.ax2 = self.fig.add_axes([0.05, 0.88, 0.90, 0.10], sharex=self.ax1)
-        self.ax2t= matplotlib.pyplot.twinx(self.ax2)
+        self.ax2t= self.ax2.twinx()
+        
+        # trace header lines, updated in place as the display is scrolled
+        self._h1_line, = self.ax2.plot([], [], 'b')
+        self._h2_line, = self.ax2t.plot([], [], 'r')
+        
+        # re-decimate the seismic image when the canvas or view changes
+        self.canvas.mpl_connect('resize_event', self._on_view_changed)
+        self.ax1.callbacks.connect('xlim_changed', self._on_view_changed)
+        self.ax1.callbacks.connect('ylim_changed', self._on_view_changed)
         
         #  Create a panel to hold all of the various widgets that will be used
         #  to edit the seismic display properties
@@ -192,6 +305,14 @@ class AuraSEGYView(wx.Frame):
         self.Bind(wx.EVT_TEXT_ENTER, self.onEnter, self.tcH1Fmt)
         self.Bind(wx.EVT_TEXT_ENTER, self.onEnter, self.tcH2Pos)
         self.Bind(wx.EVT_TEXT_ENTER, self.onEnter, self.tcH2Fmt)
+        self.Bind(wx.EVT_TEXT, self.onTheadText, self.tcH1Pos)
+        self.Bind(wx.EVT_TEXT, self.onTheadText, self.tcH1Fmt)
+        self.Bind(wx.EVT_TEXT, self.onTheadText, self.tcH2Pos)
+        self.Bind(wx.EVT_TEXT, self.onTheadText, self.tcH2Fmt)
+        
+        # Timer used to coalesce bursts of control events into one refresh
+        self._refresh_timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self._on_refresh_timer, self._refresh_timer)
 
         
 
@@ -245,16 +366,22 @@ class AuraSEGYView(wx.Frame):
         
         
     def formatAxes(self):
+        """
+        Apply the static axes formatting.  This is done once when the window
+        is built; the axes are never cleared so it does not need repeating.
+        """
+        
+        from matplotlib.ticker import FormatStrFormatter
+        majorFormatter = FormatStrFormatter('%i')
         
         self.ax1.set_aspect('auto')
-        self.ax1.grid()
+        self.ax1.grid(True)
         self.ax1.set_xlabel('Trace')
         self.ax1.set_ylabel('Time (ms)')
         self.ax1.xaxis.set_major_formatter(majorFormatter)
         self.ax1.yaxis.set_major_formatter(majorFormatter)  
-        self.canvas.draw()
     
-        self.ax2.grid()
+        self.ax2.grid(True)
         self.ax2.set_ylabel('Trace Head 1', color='b')
         self.ax2.tick_params(axis='y', colors='b')
         self.ax2.xaxis.set_major_formatter(majorFormatter)
@@ -264,35 +391,74 @@ class AuraSEGYView(wx.Frame):
         self.ax2t.tick_params(axis='y', colors='r')
         self.ax2t.xaxis.set_major_formatter(majorFormatter)
         self.ax2t.yaxis.set_major_formatter(majorFormatter)  
-        self.canvas.draw()
+        self.canvas.draw_idle()
     
     
     def onScroll(self, event):
-        self.cur_trace = int(self.sl1.GetValue())
+        cur_trace = int(self.sl1.GetValue())
+        num_disp_traces = int(self.tc1.GetValue())
+        
+        # Nothing to do if the slider was released where it already was
+        if (cur_trace == self.cur_trace and 
+            num_disp_traces == self.num_disp_traces):
+            return
+        
+        self._cancel_prefetch()
+        self._read_id += 1
+        self.cur_trace = cur_trace
         self.tcCurTrc.SetValue(str(int(self.cur_trace)))
-        self.num_disp_traces = int(self.tc1.GetValue())
-        self.set_def_thead()
-        del(self.segybuf)
-        self.segybuf = aura.segy.Segy(self.gather_file, def_thead=self.def_thead)
-        self.getSegyHeaders()
-        self.getSegyTraces()
+        self.num_disp_traces = num_disp_traces
+        self._refresh_timer.Start(80, wx.TIMER_ONE_SHOT)
     
     
     def onEnter(self, event):
-        self.cur_trace = int(self.tcCurTrc.GetValue())
+        cur_trace = int(self.tcCurTrc.GetValue())
+        num_disp_traces = int(self.tc1.GetValue())
+        amp_min = float(self.tcAmpMin.GetValue())
+        amp_max = float(self.tcAmpMax.GetValue())
+        
+        # Nothing to do if Enter was pressed without changing any values
+        if (cur_trace == self.cur_trace and 
+            num_disp_traces == self.num_disp_traces and
+            amp_min == self.amp_min and amp_max == self.amp_max and
+            not self._thead_dirty):
+            return
+        
+        self._cancel_prefetch()
+        self._read_id += 1
+        self.cur_trace = cur_trace
         self.sl1.SetValue(self.cur_trace)
-        self.num_disp_traces = int(self.tc1.GetValue())
-        self.amp_min = float(self.tcAmpMin.GetValue())
-        self.amp_max = float(self.tcAmpMax.GetValue())
-        self.set_def_thead()
-        del(self.segybuf)
-        self.segybuf = aura.segy.Segy(self.gather_file, def_thead=self.def_thead)
+        self.num_disp_traces = num_disp_traces
+        self.amp_min = amp_min
+        self.amp_max = amp_max
+        self._refresh_timer.Start(80, wx.TIMER_ONE_SHOT)
+    
+    
+    def onTheadText(self, event):
+        """
+        Flag the trace header definition for rebuilding when any of the
+        header position or format boxes are edited.
+        """
+        
+        self._thead_dirty = True
+        event.Skip()
+    
+    
+    def _on_refresh_timer(self, event):
+        """
+        Read and redraw the current trace window once the controls have
+        stopped changing.
+        """
+        
+        # Nothing to read until a SEG-Y file has been opened
+        if not self.gather_file:
+            return
+        
         self.set_def_thead()
-        self.getSegyHeaders()
-        self.getSegyTraces()
+        self.getSegyWindow()
 
 
-    def getSegyTraces(self):
+    def getSegyWindow(self):
         t0 = self.cur_trace - 1
         t1 = self.cur_trace + self.num_disp_traces - 1
 
@@ -304,91 +470,261 @@ class AuraSEGYView(wx.Frame):
             t0 = t1 - self.num_disp_traces
             self.sl1.SetValue(t0+1)
         
-        tdata = self.segybuf.read_multi_trace_data_new(t0, t1)
+        self._read_id += 1
+        thread = threading.Thread(target=self._do_read_window, 
+                                  args=(self._read_id, self._reader_state(), 
+                                        t0, t1))
+        thread.daemon = True
+        thread.start()
+    
+    
+    def _reader_state(self):
+        """
+        Snapshot of the file and header definition attributes used by
+        _read_window.  Taken on the GUI thread so a worker thread never sees
+        a partially updated definition.
+        """
         
-        self.tdata = np.array(tdata)
+        return (self.gather_file, self.mm, self.samp_fmt, self.thead_dtype,
+                (self.head1_fmt, self.head2_fmt))
+    
+    
+    def _do_read_window(self, read_id, state, t0, t1):
+        """
+        Worker thread method to read a trace window off the GUI thread and
+        pass the result back to it.
+        """
+        
+        with self._read_lock:
+            if read_id != self._read_id:
+                return
+            window = self._read_window(state, t0, t1)
+        
+        wx.CallAfter(self._apply_window, read_id, t0, t1, window)
+    
+    
+    def _apply_window(self, read_id, t0, t1, window):
+        """
+        Plot a trace window read by _do_read_window, unless a newer read has
+        been requested in the meantime.
+        """
+        
+        if read_id != self._read_id:
+            return
+        
+        self.thead_h1, self.thead_h2, self.tdata = window
+        self._prefetch(t0, t1)
                 
         self.StatBar.SetStatusText('Reading Traces %i to %i... DONE!' % 
-                                   (self.cur_trace, t1))
+                                   (t0+1, t1))
         
-        self.plotSegyHeaders()
-        self.plotSegyTraces()
+        self.plotSegyHeaders(t0, t1)
+        self.plotSegyTraces(t0, t1)
         
         
-    def plotSegyTraces(self):
-        xmin = self.cur_trace
-        xmax = self.cur_trace + self.num_disp_traces
-        tmin = 0
-        tmax = self.segybuf.bhead['num_samp']*self.segybuf.bhead['samp_rate']*0.001
-        bounds = [xmin, xmax, tmax, tmin]
-        self.ax1.cla()
-        self.ax1.imshow(self.tdata.T, cmap=cm.bwr_r, vmin=self.amp_min, vmax=self.amp_max, extent=bounds)
-
-        self.formatAxes()
+    def _read_window(self, state, t0, t1):
+        """
+        Return the two trace header values and the trace samples for traces
+        t0 to t1, served from the read-ahead cache when available.  state is
+        a snapshot from _reader_state; this runs on worker threads so it
+        must not read the live frame attributes.
+        """
         
+        gather_file, mm, samp_fmt, thead_dtype, thead_fmts = state
+        key = (gather_file, t0, t1, thead_dtype)
+        
+        with self._cache_lock:
+            if key in self._trace_cache:
+                self._trace_cache.move_to_end(key)
+                return self._trace_cache[key]
+        
+        #  Headers and samples are interleaved in each trace record, so take
+        #  both from the same slice of records in a single pass.  The 240
+        #  byte header block is reinterpreted with the header definition
+        #  dtype; no per-trace unpacking.
+        rec = mm[t0:t1]
+        thead = rec['hdr'].view(thead_dtype)
+        
+        heads = []
+        for name, fmt in zip(['head1', 'head2'], thead_fmts):
+            head = thead[name]
+            if fmt == 'ibm':
+                head = ibm2ieee(head)
+            else:
+                head = head.astype(head.dtype.newbyteorder('='))
+            heads.append(head)
+        
+        #  Decode out of the memmap into native float32 so the disk read
+        #  happens here rather than lazily on the GUI thread when plotted
+        if samp_fmt == 1:
+            tdata = ibm2ieee(rec['samp'])
+        else:
+            tdata = np.asarray(rec['samp'], dtype=np.float32)
+        
+        window = (heads[0], heads[1], tdata)
+        
+        with self._cache_lock:
+            self._trace_cache[key] = window
+            while len(self._trace_cache) > self._trace_cache_size:
+                self._trace_cache.popitem(last=False)
+        
+        return window
+    
+    
+    def _prefetch(self, t0, t1):
+        """
+        Queue background reads of the windows either side of traces t0 to t1.
+        """
         
-    def getSegyHeaders(self):
-        self.StatBar.SetStatusText('Reading Headers...')
-
-        t0 = self.cur_trace - 1
-        t1 = self.cur_trace + self.num_disp_traces - 1
+        state = self._reader_state()
+        n = t1 - t0
+        for p0 in [t1, t0-n]:
+            p0 = max(min(p0, self.num_traces-n), 0)
+            if p0 != t0:
+                future = self._prefetch_pool.submit(self._read_window, state,
+                                                    p0, p0+n)
+                self._prefetch_futures.append(future)
+    
+    
+    def _cancel_prefetch(self):
+        """
+        Cancel any queued reads that have not yet started.
+        """
         
-        if t1 > self.num_traces:
-            t1 = self.num_traces
-            t0 = t1 - self.num_disp_traces
-            self.sl1.SetValue(t0+1)
-            
-        self.segybuf.read_thead2(t0, t1)
-        self.StatBar.SetStatusText('Reading Headers...Done!')
+        for future in self._prefetch_futures:
+            future.cancel()
+        self._prefetch_futures = []
     
     
-    def plotSegyHeaders(self):
-        t0 = self.cur_trace
-        t1 = self.cur_trace + self.num_disp_traces
+    def plotSegyTraces(self, t0, t1):
+        xmin = t0 + 1
+        xmax = t1 + 1
+        tmin = 0
+        tmax = self._tmax_ms
+        bounds = [xmin, xmax, tmax, tmin]
         
-        x = np.arange(t0, t1, 1)
-        h1 = self.segybuf.thead['head1']
-        h2 = self.segybuf.thead['head2']
+        if self._im is None:
+            self._im = self.ax1.imshow(self.tdata.T, cmap='bwr_r', 
+                                       vmin=self.amp_min, vmax=self.amp_max, 
+                                       extent=bounds, aspect='auto', 
+                                       interpolation='nearest', origin='upper',
+                                       resample=False)
+        else:
+            # Suppress the limit change callbacks; the image is decimated
+            # once below instead of once per set_xlim/set_ylim
+            self._updating_view = True
+            try:
+                self._im.set_extent(bounds)
+                self._im.set_clim(self.amp_min, self.amp_max)
+                self.ax1.set_xlim(xmin, xmax)
+                self.ax1.set_ylim(tmax, tmin)
+            finally:
+                self._updating_view = False
+        
+        self._im.set_data(self._display_data(bounds).T)
+        self.canvas.draw_idle()
+    
+    
+    def _display_data(self, bounds):
+        """
+        Return the trace data decimated to roughly one trace and one sample
+        per screen pixel over the visible part of the seismic axes.
+        """
+        
+        bbox = self.ax1.get_window_extent()
+        xlim = self.ax1.get_xlim()
+        ylim = self.ax1.get_ylim()
         
-        self.ax2.cla()
-        self.ax2t.cla()
+        ntrc, nsamp = self.tdata.shape
+        vis_trc = ntrc * min(abs(xlim[1]-xlim[0]) / abs(bounds[1]-bounds[0]), 1.0)
+        vis_samp = nsamp * min(abs(ylim[1]-ylim[0]) / abs(bounds[2]-bounds[3]), 1.0)
         
-        self.ax2.plot(x, h1, 'b')
-        self.ax2.set_ylim([min(h1), max(h1)])
+        sx = max(1, int(vis_trc // max(bbox.width, 1)))
+        sy = max(1, int(vis_samp // max(bbox.height, 1)))
         
-        self.ax2t.plot(x, h2, 'r')
-        self.ax2t.set_ylim([min(h2), max(h2)])
+        return self.tdata[::sx, ::sy]
     
     
-    def set_def_thead(self):
+    def _on_view_changed(self, *args):
+        """
+        Event handler to update the decimated seismic image after a canvas
+        resize, zoom or pan.
+        """
+        
+        if self._im is None or self._updating_view:
+            return
         
-        self.head1_fmt = str(self.tcH1Fmt.GetValue())
-        self.head2_fmt = str(self.tcH2Fmt.GetValue())
+        self._im.set_data(self._display_data(self._im.get_extent()).T)
+        self.canvas.draw_idle()
         
-        self.head1_pos = int(self.tcH1Pos.GetValue())
-        self.head2_pos = int(self.tcH2Pos.GetValue())
         
-        # Set number of bytes for Header 1
-        if self.head1_fmt in ['l', 'f', 'ibm']:
-            h1_nbyte = 4
-        elif self.head1_fmt == 'h':
-            h1_nbyte = 2
-        elif self.head1_fmt == 's':
-            h1_nbyte = 1
+    def plotSegyHeaders(self, t0, t1):
+        n = t1 - t0
         
-        # Set number of bytes for Header 2
-        if self.head2_fmt in ['l', 'f', 'ibm']:
-            h2_nbyte = 4
-        elif self.head2_fmt == 'h':
-            h2_nbyte = 2
-        elif self.head2_fmt == 's':
-            h2_nbyte = 1
+        if self._x_len != n:
+            self._x_axis = np.arange(n, dtype=np.int32)
+            self._x_len = n
+        x = self._x_axis + (t0 + 1)
+        
+        h1 = self.thead_h1
+        h2 = self.thead_h2
+        
+        self._h1_line.set_data(x, h1)
+        self._h2_line.set_data(x, h2)
+        
+        self.ax2.set_ylim(h1.min(), h1.max())
+        self.ax2t.set_ylim(h2.min(), h2.max())
+    
+    
+    def set_def_thead(self):
+        
+        # Only rebuild the definition if the header boxes have been edited
+        if not self._thead_dirty:
+            return
+        
+        head1_fmt = str(self.tcH1Fmt.GetValue())
+        head2_fmt = str(self.tcH2Fmt.GetValue())
+        
+        # Parse and check all four boxes before changing any settings, so a
+        # bad entry leaves the previous definition fully in place
+        try:
+            h1_nbyte = thead_nbytes[head1_fmt]
+            h2_nbyte = thead_nbytes[head2_fmt]
+            head1_pos = int(self.tcH1Pos.GetValue())
+            head2_pos = int(self.tcH2Pos.GetValue())
+            for pos, nbyte in [(head1_pos, h1_nbyte), (head2_pos, h2_nbyte)]:
+                if not 1 <= pos <= 241 - nbyte:
+                    raise ValueError('byte position %i is outside the '
+                                     '240 byte trace header' % pos)
+        except KeyError as err:
+            wx.MessageBox('Unknown trace header format code: %s' % err,
+                          'Header Format Error', wx.OK|wx.ICON_ERROR)
+            return
+        except ValueError as err:
+            wx.MessageBox('Invalid trace header position: %s' % err,
+                          'Header Format Error', wx.OK|wx.ICON_ERROR)
+            return
+        
+        self.head1_fmt = head1_fmt
+        self.head2_fmt = head2_fmt
+        
+        self.head1_pos = head1_pos
+        self.head2_pos = head2_pos
         
         # Build structure for format definition
         def_thead = {'head1':{'bpos':self.head1_pos,  'fmt':self.head1_fmt, 'nbyte':h1_nbyte},
                      'head2':{'bpos':self.head2_pos,  'fmt':self.head2_fmt, 'nbyte':h2_nbyte}
                      }
         self.def_thead = def_thead
+        
+        # Equivalent numpy dtype for reading both headers from a trace record
+        self.thead_dtype = np.dtype({'names':['head1', 'head2'],
+                                     'formats':[thead_dtypes[self.head1_fmt],
+                                                thead_dtypes[self.head2_fmt]],
+                                     'offsets':[self.head1_pos-1, self.head2_pos-1],
+                                     'itemsize':240})
+        
+        self._thead_dirty = False
     
     
     
@@ -404,24 +740,52 @@ class AuraSEGYView(wx.Frame):
         dlg = wx.FileDialog(self, "Select the SEG-Y Gather File...",
                             style=wx.FD_OPEN)
         
+        gather_file = self.gather_file
         if dlg.ShowModal() == wx.ID_OK:
-            self.gather_file = dlg.GetPath()
+            gather_file = dlg.GetPath()
 
         dlg.Destroy()
         
-        self.SetTitle('Aura - GatherView: %s' % self.gather_file)
-        
         self.set_def_thead()
         
-        self.segybuf = aura.segy.Segy(self.gather_file, def_thead=self.def_thead)
-        self.num_traces = self.segybuf.num_traces
+        segybuf = aura.segy.Segy(gather_file, def_thead=self.def_thead)
+        bhead = segybuf.bhead
+        
+        # Check the sample format can be memory-mapped before switching files
+        try:
+            samp_dtype = np.dtype(samp_dtypes[bhead['samp_fmt']])
+        except KeyError:
+            wx.MessageBox('Unsupported sample format code: %s' % bhead['samp_fmt'],
+                          'SEG-Y Format Error', wx.OK|wx.ICON_ERROR)
+            return
+        
+        self.gather_file = gather_file
+        self.segybuf = segybuf
+        
+        self.SetTitle('Aura - GatherView: %s' % self.gather_file)
         
+        self._cancel_prefetch()
+        with self._cache_lock:
+            self._trace_cache.clear()
+        self.num_traces = self.segybuf.num_traces
+
+        #  Memory-map the trace records so that trace windows can be sliced
+        #  directly from the file without building intermediate lists.  The
+        #  traces are assumed to start straight after the 3600 byte textual
+        #  and binary headers; extended textual header records are not
+        #  supported.
+        self.samp_fmt = bhead['samp_fmt']
+        self._tmax_ms = bhead['num_samp']*bhead['samp_rate']*0.001
+        self.trc_dtype = np.dtype([('hdr', 'V240'),
+                                   ('samp', samp_dtype, bhead['num_samp'])])
+        self.mm = np.memmap(self.gather_file, dtype=self.trc_dtype, mode='r',
+                            offset=3600, shape=(self.num_traces,))
+
         self.sl1.SetRange(1, self.num_traces)
         self.sl1.SetValue(1)
         self.cur_trace = int(self.sl1.GetValue())
         
-        self.getSegyHeaders()
-        self.getSegyTraces()
+        self.getSegyWindow()
         
         
     def OnExit(self, event):
@@ -430,6 +794,18 @@ class AuraSEGYView(wx.Frame):
         """
         
         self.Close()
+    
+    
+    def OnClose(self, event):
+        """
+        Event handler for closing the main window.  Drops any queued
+        prefetch reads so the application does not wait on them at exit.
+        """
+        
+        self._refresh_timer.Stop()
+        self._cancel_prefetch()
+        self._prefetch_pool.shutdown(wait=False, cancel_futures=True)
+        event.Skip()
 
 
     ########################################
@@ -449,8 +825,9 @@ class AuraSEGYView(wx.Frame):
         tcEBCDIC = wx.TextCtrl(frEBCDIC, -1, '', 
                                style=wx.TE_MULTILINE|wx.TE_READONLY, size=(-1, -1))
 
-        for line in self.segybuf.ebcdic:
-            tcEBCDIC.AppendText(line)
+        tcEBCDIC.Freeze()
+        tcEBCDIC.SetValue(''.join(self.segybuf.ebcdic))
+        tcEBCDIC.Thaw()
                     
         frEBCDIC.Show()
 